@@ -52,6 +52,9 @@ async function main() {
             }
         }
         const results = await categorizer.categorizeBatch(transactions);
+        if (categorizer.close) {
+            categorizer.close();
+        }
         // Process results
         let categorized = 0;
         let skipped = 0;
@@ -16,6 +16,8 @@ export class LocalCategorizer {
         this.trainerDir = path.join(__dirname, '..', 'trainer');
         this.predictScript = path.join(this.trainerDir, 'trainer', 'predict.py');
         this.modelPath = path.join(this.trainerDir, 'model.joblib');
+        // Persistent Python predictor process (started on first use)
+        this.predictor = null;
     }
     /**
      * Check if the trained model exists
@@ -74,41 +76,74 @@ export class LocalCategorizer {
         }
     }
     /**
-     * Run the Python prediction script
+     * Start the Python predictor, or return the one already running.
+     * The process stays alive and answers one JSON line per request line.
      */
-    runPythonPredictor(input) {
-        return new Promise((resolve, reject) => {
-            // Use 'uv run' to execute Python with the virtual environment
-            const python = spawn('uv', ['run', 'python', '-m', 'trainer.predict'], {
-                cwd: this.trainerDir,
-            });
-            let stdout = '';
-            let stderr = '';
-            python.stdout.on('data', (data) => {
-                stdout += data.toString();
-            });
-            python.stderr.on('data', (data) => {
-                stderr += data.toString();
-            });
-            python.on('close', (code) => {
-                if (code !== 0) {
-                    reject(new Error(`Python exited with code ${code}: ${stderr}`));
-                    return;
+    getPredictor() {
+        if (this.predictor) {
+            return this.predictor;
+        }
+        // Use 'uv run' to execute Python with the virtual environment
+        const python = spawn('uv', ['run', 'python', '-m', 'trainer.predict'], {
+            cwd: this.trainerDir,
+        });
+        const pending = [];
+        let buffer = '';
+        let stderr = '';
+        python.stdout.on('data', (data) => {
+            buffer += data.toString();
+            let newline;
+            while ((newline = buffer.indexOf('\n')) !== -1) {
+                const line = buffer.slice(0, newline);
+                buffer = buffer.slice(newline + 1);
+                const request = pending.shift();
+                if (!request) {
+                    continue;
                 }
                 try {
-                    const result = JSON.parse(stdout);
+                    const result = JSON.parse(line);
                     if (result.error) {
-                        reject(new Error(result.error));
+                        request.reject(new Error(result.error));
                     } else {
-                        resolve(result);
+                        request.resolve(result);
                     }
                 } catch (e) {
-                    reject(new Error(`Failed to parse Python output: ${stdout}`));
+                    request.reject(new Error(`Failed to parse Python output: ${line}`));
                 }
-            });
-            // Send input to Python stdin
-            python.stdin.write(JSON.stringify(input));
-            python.stdin.end();
+            }
+        });
+        python.stderr.on('data', (data) => {
+            stderr += data.toString();
+        });
+        python.on('close', (code) => {
+            // Only forget the predictor if a newer one hasn't replaced it
+            if (this.predictor && this.predictor.python === python) {
+                this.predictor = null;
+            }
+            for (const request of pending.splice(0)) {
+                request.reject(new Error(`Python exited with code ${code}: ${stderr}`));
+            }
         });
+        this.predictor = { python, pending };
+        return this.predictor;
+    }
+    /**
+     * Send a batch to the Python predictor and wait for its response line
+     */
+    runPythonPredictor(input) {
+        return new Promise((resolve, reject) => {
+            const { python, pending } = this.getPredictor();
+            pending.push({ resolve, reject });
+            python.stdin.write(JSON.stringify(input) + '\n');
+        });
+    }
+    /**
+     * Stop the Python predictor process
+     */
+    close() {
+        if (this.predictor) {
+            this.predictor.python.stdin.end();
+            this.predictor = null;
+        }
     }
 }
\ No newline at end of file
@@ -8,22 +8,25 @@ This script:
 4. Reports accuracy statistics for both splits
 5. Shows detailed failure analysis
 """
-import json
+import heapq
 import sys
 from pathlib import Path
 from collections import Counter
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+import orjson
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import accuracy_score
 import numpy as np
 
+from trainer.features import prepare_features
+from trainer.scoring import best_class, finalize_model
+
 
 def load_data(data_file: Path) -> tuple[list[dict], dict]:
     """Load training data from JSON file."""
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(data_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
     category_map = {cat['id']: cat['name'] for cat in data['categories']}
     
@@ -36,30 +39,19 @@ def load_data(data_file: Path) -> tuple[list[dict], dict]:
     return categorized, category_map
 
 
-def prepare_features(tx: dict) -> str:
-    """Convert a transaction to feature text."""
-    payee = tx.get('payee_name') or tx.get('imported_payee') or ''
-    notes = tx.get('notes') or ''
-    amount = tx.get('amount', 0)
-    amount_type = 'expense' if amount < 0 else 'income'
-    
-    # Clean notes - remove AI confidence markers
-    if '[AI:' in notes:
-        notes = notes.split('[AI:')[0].strip()
-    
-    return f"{payee} {notes} {amount_type}".strip().lower()
-
-
 def create_pipeline() -> Pipeline:
     """Create a fresh classifier pipeline."""
     return Pipeline([
-        ('tfidf', TfidfVectorizer(
+        ('hash', HashingVectorizer(
+            n_features=2**14,
             ngram_range=(1, 2),
-            max_features=5000,
-            min_df=1,
+            alternate_sign=False,  # MultinomialNB needs non-negative features
+            norm=None,  # raw counts; TfidfTransformer normalizes
+            dtype=np.float32,
             strip_accents='unicode',
             lowercase=True,
         )),
+        ('tfidf', TfidfTransformer(sublinear_tf=True)),
         ('clf', MultinomialNB(alpha=0.1)),
     ])
 
@@ -67,70 +59,75 @@ def create_pipeline() -> Pipeline:
 def evaluate_split(train_txs: list[dict], test_txs: list[dict], category_map: dict) -> dict:
     """Train on one split, evaluate on the other."""
     # Prepare data
-    train_texts = [prepare_features(tx) for tx in train_txs]
+    train_texts = prepare_features(train_txs)
     train_labels = [tx['category'] for tx in train_txs]
     
-    test_texts = [prepare_features(tx) for tx in test_txs]
+    test_texts = prepare_features(test_txs)
     test_labels = [tx['category'] for tx in test_txs]
     
     # Train
     pipeline = create_pipeline()
     pipeline.fit(train_texts, train_labels)
+    finalize_model(pipeline)  # score the same float32 model train.py ships
     
-    # Predict
-    predictions = pipeline.predict(test_texts)
-    probabilities = pipeline.predict_proba(test_texts)
-    confidences = [max(probs) for probs in probabilities]
+    # Predict (single scoring pass on the joint log-likelihood)
+    X = pipeline[:-1].transform(test_texts)
+    pred_idx, confidences = best_class(pipeline.named_steps['clf'], X)
+    predictions = pipeline.classes_[pred_idx]
     
     # Calculate metrics
-    accuracy = accuracy_score(test_labels, predictions)
+    correct_mask = np.asarray(test_labels) == predictions
+    num_correct = int(correct_mask.sum())
+    accuracy = correct_mask.mean()
     
-    # Per-category accuracy
-    correct_by_category = Counter()
-    total_by_category = Counter()
-    
-    for true_label, pred_label in zip(test_labels, predictions):
-        total_by_category[true_label] += 1
-        if true_label == pred_label:
-            correct_by_category[true_label] += 1
+    # Per-category accuracy (labels as integer codes, counted with bincount)
+    classes, label_codes = np.unique(test_labels, return_inverse=True)
+    total_by_category = np.bincount(label_codes)
+    correct_by_category = np.bincount(label_codes, weights=correct_mask)
     
     category_accuracy = {
-        cat_id: correct_by_category[cat_id] / total_by_category[cat_id]
-        for cat_id in total_by_category
+        cat_id: correct_by_category[i] / total_by_category[i]
+        for i, cat_id in enumerate(classes.tolist())
+        if total_by_category[i]
     }
     
-    # Confidence analysis
-    correct_mask = [t == p for t, p in zip(test_labels, predictions)]
-    correct_confidences = [c for c, m in zip(confidences, correct_mask) if m]
-    wrong_confidences = [c for c, m in zip(confidences, correct_mask) if not m]
+    # Confidence analysis (boolean indexing, no Python-level filtering)
+    avg_correct = confidences[correct_mask].mean() if correct_mask.any() else 0.0
+    avg_wrong = confidences[~correct_mask].mean() if (~correct_mask).any() else 0.0
+    
+    # Count every confusion, but only collect details for the 15 most
+    # confident failures (highest first)
+    wrong_idx = np.flatnonzero(~correct_mask)
+    confusions = Counter(zip(
+        np.asarray(test_labels)[wrong_idx].tolist(),
+        predictions[wrong_idx].tolist(),
+    ))
     
-    # Collect failures with details
     failures = []
-    for i, (tx, true_label, pred_label, conf) in enumerate(
-        zip(test_txs, test_labels, predictions, confidences)
-    ):
-        if true_label != pred_label:
-            failures.append({
-                'payee': tx.get('payee_name') or tx.get('imported_payee') or 'Unknown',
-                'notes': tx.get('notes') or '',
-                'amount': tx.get('amount', 0),
-                'expected': true_label,
-                'predicted': pred_label,
-                'confidence': conf,
-            })
+    for i in heapq.nlargest(15, wrong_idx.tolist(), key=lambda i: confidences[i]):
+        tx = test_txs[i]
+        failures.append({
+            'payee': tx.get('payee_name') or tx.get('imported_payee') or 'Unknown',
+            'notes': tx.get('notes') or '',
+            'amount': tx.get('amount', 0),
+            'expected': test_labels[i],
+            'predicted': predictions[i],
+            'confidence': confidences[i],
+        })
     
     return {
         'accuracy': accuracy,
         'total_test': len(test_labels),
-        'correct': sum(correct_mask),
-        'wrong': len(test_labels) - sum(correct_mask),
-        'avg_confidence_correct': np.mean(correct_confidences) if correct_confidences else 0,
-        'avg_confidence_wrong': np.mean(wrong_confidences) if wrong_confidences else 0,
+        'correct': num_correct,
+        'wrong': len(test_labels) - num_correct,
+        'avg_confidence_correct': avg_correct,
+        'avg_confidence_wrong': avg_wrong,
         'category_accuracy': category_accuracy,
         'predictions': predictions,
         'test_labels': test_labels,
         'confidences': confidences,
         'failures': failures,
+        'confusions': confusions,
     }
 
 
@@ -139,6 +136,11 @@ def get_category_name(cat_id: str, category_map: dict) -> str:
     return category_map.get(cat_id, f"[Unknown: {cat_id[:8]}...]")
 
 
+def category_names(cat_ids: set, category_map: dict) -> dict:
+    """Map each category ID to its name, looked up once per ID."""
+    return {cat_id: get_category_name(cat_id, category_map) for cat_id in cat_ids}
+
+
 def print_results(results: dict, category_map: dict, split_name: str):
     """Print evaluation results."""
     print(f"\n{'='*70}")
@@ -155,14 +157,15 @@ def print_results(results: dict, category_map: dict, split_name: str):
     
     # Top 10 categories by count
     print(f"\n📁 Per-Category Accuracy (top 10 by frequency):")
+    label_counts = Counter(results['test_labels'])
     sorted_cats = sorted(
         results['category_accuracy'].items(),
-        key=lambda x: -Counter(results['test_labels'])[x[0]]
+        key=lambda x: -label_counts[x[0]]
     )[:10]
     
     for cat_id, acc in sorted_cats:
         cat_name = get_category_name(cat_id, category_map)[:25]
-        count = Counter(results['test_labels'])[cat_id]
+        count = label_counts[cat_id]
         print(f"   {cat_name:<25} {acc:>6.1%} ({count} samples)")
     
     # Show failure examples
@@ -171,13 +174,17 @@ def print_results(results: dict, category_map: dict, split_name: str):
         print(f"   {'Payee':<25} {'Expected':<15} {'Predicted':<15} {'Conf':<6}")
         print(f"   {'-'*25} {'-'*15} {'-'*15} {'-'*6}")
         
-        # Sort by confidence (highest first - most confident mistakes)
-        sorted_failures = sorted(results['failures'], key=lambda x: -x['confidence'])[:15]
+        # Already sorted by confidence (highest first - most confident mistakes)
+        failures = results['failures']
+        name_by_id = category_names(
+            {f['expected'] for f in failures} | {f['predicted'] for f in failures},
+            category_map,
+        )
         
-        for f in sorted_failures:
+        for f in failures:
             payee = f['payee'][:25]
-            expected = get_category_name(f['expected'], category_map)[:15]
-            predicted = get_category_name(f['predicted'], category_map)[:15]
+            expected = name_by_id[f['expected']][:15]
+            predicted = name_by_id[f['predicted']][:15]
             conf = f"{f['confidence']:.0%}"
             print(f"   {payee:<25} {expected:<15} {predicted:<15} {conf:<6}")
 
@@ -185,11 +192,13 @@ def print_results(results: dict, category_map: dict, split_name: str):
 def print_confusion_analysis(results: dict, category_map: dict):
     """Print analysis of common confusions."""
     confusion_pairs = Counter()
+    name_by_id = category_names(
+        {cat_id for pair in results['confusions'] for cat_id in pair},
+        category_map,
+    )
     
-    for f in results['failures']:
-        expected = get_category_name(f['expected'], category_map)
-        predicted = get_category_name(f['predicted'], category_map)
-        confusion_pairs[(expected, predicted)] += 1
+    for (expected, predicted), count in results['confusions'].items():
+        confusion_pairs[(name_by_id[expected], name_by_id[predicted])] += count
     
     if confusion_pairs:
         print(f"\n🔄 Most Common Confusions:")
@@ -213,22 +222,25 @@ def main():
         print(f"❌ Not enough categorized transactions ({len(transactions)}). Need at least 20.")
         sys.exit(1)
     
-    print(f"   Found {len(transactions)} categorized transactions")
-    print(f"   Categories: {len(set(tx['category'] for tx in transactions))}")
-    
-    # Check for categories not in map
+    # Collect categories, check for categories not in map, and split into
+    # even/odd, all in a single pass
+    categories_seen = set()
     unknown_cats = set()
-    for tx in transactions:
-        if tx['category'] not in category_map:
-            unknown_cats.add(tx['category'])
+    even_txs = []
+    odd_txs = []
+    for i, tx in enumerate(transactions):
+        cat = tx['category']
+        categories_seen.add(cat)
+        if cat not in category_map:
+            unknown_cats.add(cat)
+        (even_txs if i % 2 == 0 else odd_txs).append(tx)
+    
+    print(f"   Found {len(transactions)} categorized transactions")
+    print(f"   Categories: {len(categories_seen)}")
     
     if unknown_cats:
         print(f"   ⚠️  {len(unknown_cats)} category IDs not found in category list")
     
-    # Split into even/odd
-    even_txs = [tx for i, tx in enumerate(transactions) if i % 2 == 0]
-    odd_txs = [tx for i, tx in enumerate(transactions) if i % 2 == 1]
-    
     print(f"\n🔀 Splitting data:")
     print(f"   Even indices: {len(even_txs)} transactions")
     print(f"   Odd indices: {len(odd_txs)} transactions")
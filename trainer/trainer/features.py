@@ -0,0 +1,27 @@
+"""
+Feature extraction shared by training, evaluation and prediction.
+Turns transactions into the text fed to the classifier.
+"""
+import re
+
+AI_MARKER = re.compile(r'\[AI:')
+
+
+def clean_notes(notes: str) -> str:
+    """Remove AI confidence markers ("[AI: XX%]") added by previous runs."""
+    return AI_MARKER.split(notes, 1)[0].strip()
+
+
+def transaction_text(tx: dict) -> str:
+    """Convert a transaction to feature text (payee + notes + amount type)."""
+    payee = tx.get('payee_name') or tx.get('imported_payee') or ''
+    notes = clean_notes(tx.get('notes') or '')
+    amount = tx.get('amount', 0)
+    amount_type = 'expense' if amount < 0 else 'income'
+    
+    return f"{payee} {notes} {amount_type}".strip().lower()
+
+
+def prepare_features(transactions: list[dict]) -> list[str]:
+    """Convert a batch of transactions to feature texts."""
+    return [transaction_text(tx) for tx in transactions]
@@ -1,32 +1,74 @@
 """
 Load and use the trained classifier for predictions.
-This module is called from Node.js via subprocess.
+This module is run by Node.js as a long-lived subprocess.
 """
-import json
 import sys
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+import orjson
 from joblib import load
+from sklearn.preprocessing import normalize
+
+from trainer.features import prepare_features, transaction_text
+from trainer.scoring import best_class
+
+
+@lru_cache(maxsize=4)
+def _load_pipeline(model_path: str):
+    """Load a trained pipeline, cached per path."""
+    return load(model_path)
+
+
+@lru_cache(maxsize=4)
+def _load_categories(categories_path: str) -> dict:
+    """Load the category id -> name map, cached per path."""
+    with open(categories_path, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def _transform(pipeline, texts: list[str]):
+    """
+    Vectorize texts into the features expected by the classifier step.
+    Applies the fitted IDF weights in place on the hashed counts instead of
+    going through TfidfTransformer's sparse diagonal multiply, which copies.
+    """
+    if 'hash' not in pipeline.named_steps:
+        # Models trained before the hashing vectorizer
+        return pipeline[:-1].transform(texts)
+    
+    tfidf = pipeline.named_steps['tfidf']
+    X = pipeline.named_steps['hash'].transform(texts)
+    if tfidf.sublinear_tf:
+        np.log(X.data, out=X.data)
+        X.data += 1
+    if tfidf.use_idf:
+        np.multiply(X.data, tfidf.idf_.take(X.indices), out=X.data)
+    if tfidf.norm:
+        X = normalize(X, norm=tfidf.norm, copy=False)
+    return X
 
 
 def predict(payee: str, notes: str, amount: float, model_path: Path, categories_path: Path) -> dict:
     """
     Predict category for a transaction.
     Returns dict with category_id, category_name, and confidence.
+
+    The model and category map are cached after the first call, so callers
+    should reuse this across transactions rather than reloading the model.
     """
-    # Load model and categories
-    pipeline = load(model_path)
-    with open(categories_path, 'r', encoding='utf-8') as f:
-        category_map = json.load(f)
+    pipeline = _load_pipeline(str(model_path))
+    category_map = _load_categories(str(categories_path))
     
     # Prepare input text (same format as training)
-    amount_type = 'expense' if amount < 0 else 'income'
-    text = f"{payee} {notes} {amount_type}".strip().lower()
+    text = transaction_text({'payee_name': payee, 'notes': notes, 'amount': amount})
     
-    # Get prediction and probabilities
-    category_id = pipeline.predict([text])[0]
-    probabilities = pipeline.predict_proba([text])[0]
-    confidence = float(max(probabilities))
+    # Call the vectorizer and classifier directly, skipping Pipeline dispatch
+    clf = pipeline.named_steps['clf']
+    pred_idx, confidences = best_class(clf, _transform(pipeline, [text]))
+    category_id = clf.classes_[pred_idx[0]]
+    confidence = float(confidences[0])
     
     return {
         'category_id': category_id,
@@ -35,58 +77,81 @@ def predict(payee: str, notes: str, amount: float, model_path: Path, categories_
     }
 
 
+def predict_batch(transactions: list[dict], pipeline, category_map: dict) -> list[dict]:
+    """
+    Predict categories for a batch of transactions.
+    Returns one dict per transaction with index, category_id, category_name
+    and confidence.
+    """
+    # Build feature texts for the whole batch in one pass
+    texts = prepare_features(transactions)
+    
+    valid_mask = [bool(text) for text in texts]
+    valid_texts = [text for text, valid in zip(texts, valid_mask) if valid]
+    
+    # Score all transactions in a single pass
+    category_ids = []
+    confidences = []
+    if valid_texts:
+        # Call the vectorizer and classifier directly, skipping Pipeline dispatch
+        clf = pipeline.named_steps['clf']
+        pred_idx, confidences = best_class(clf, _transform(pipeline, valid_texts))
+        category_ids = clf.classes_[pred_idx]
+    
+    results = []
+    scored = iter(zip(category_ids, confidences))
+    for tx, valid in zip(transactions, valid_mask):
+        category_id, confidence = next(scored) if valid else (None, 0.0)
+        results.append({
+            'index': tx.get('index', 0),
+            'category_id': category_id,
+            'category_name': category_map.get(category_id, None) if category_id else None,
+            'confidence': confidence,
+        })
+    
+    return results
+
+
 def main():
     """
     CLI interface for predictions.
-    Expects JSON input on stdin with transactions array.
-    Outputs JSON predictions to stdout.
+    Runs as a persistent process: each line on stdin is a JSON request with a
+    transactions array, answered by one line of JSON predictions on stdout.
+    The model is loaded once and reused for every request.
     """
     trainer_dir = Path(__file__).parent.parent
     model_path = trainer_dir / "model.joblib"
     categories_path = trainer_dir / "categories.json"
     
     if not model_path.exists():
-        print(json.dumps({'error': 'Model not found. Run training first.'}))
+        sys.stdout.buffer.write(orjson.dumps(
+            {'error': 'Model not found. Run training first.'},
+            option=orjson.OPT_APPEND_NEWLINE,
+        ))
         sys.exit(1)
     
-    # Load model once
-    pipeline = load(model_path)
-    with open(categories_path, 'r', encoding='utf-8') as f:
-        category_map = json.load(f)
+    # Load model once (shared with predict())
+    pipeline = _load_pipeline(str(model_path))
+    category_map = _load_categories(str(categories_path))
     
-    # Read transactions from stdin
-    input_data = json.load(sys.stdin)
-    transactions = input_data.get('transactions', [])
-    
-    results = []
-    for tx in transactions:
-        payee = tx.get('payee_name') or tx.get('imported_payee') or ''
-        notes = tx.get('notes') or ''
-        amount = tx.get('amount', 0)
+    # Read bytes; Node always writes UTF-8 regardless of the locale
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
         
-        # Clean notes
-        if '[AI:' in notes:
-            notes = notes.split('[AI:')[0].strip()
+        # A bad request gets an error response instead of killing the process
+        try:
+            request = orjson.loads(line)
+            results = predict_batch(request.get('transactions', []), pipeline, category_map)
+        except Exception as e:
+            results = {'error': str(e)}
         
-        amount_type = 'expense' if amount < 0 else 'income'
-        text = f"{payee} {notes} {amount_type}".strip().lower()
-        
-        if text:
-            category_id = pipeline.predict([text])[0]
-            probabilities = pipeline.predict_proba([text])[0]
-            confidence = float(max(probabilities))
-        else:
-            category_id = None
-            confidence = 0.0
-        
-        results.append({
-            'index': tx.get('index', 0),
-            'category_id': category_id,
-            'category_name': category_map.get(category_id, None) if category_id else None,
-            'confidence': confidence,
-        })
-    
-    print(json.dumps(results))
+        # numpy scalars from the classifier are serialized as-is
+        sys.stdout.buffer.write(orjson.dumps(
+            results,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+        ))
+        sys.stdout.buffer.flush()
 
 
 if __name__ == "__main__":
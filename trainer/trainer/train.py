@@ -6,44 +6,39 @@ import json
 import sys
 from pathlib import Path
 
+import orjson
 from joblib import dump
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import cross_val_score
 import numpy as np
 
+from trainer.features import prepare_features
+from trainer.scoring import finalize_model
+
 
 def load_training_data(data_file: Path) -> tuple[list[str], list[str], dict]:
     """
     Load training data from JSON file.
     Returns (texts, labels, category_map).
     """
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(data_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
-    texts = []
-    labels = []
     category_map = {cat['id']: cat['name'] for cat in data['categories']}
     
-    for tx in data['transactions']:
-        if not tx.get('category'):
-            continue  # Skip uncategorized
-            
-        # Combine payee + notes + amount info as features
-        payee = tx.get('payee_name') or tx.get('imported_payee') or ''
-        notes = tx.get('notes') or ''
-        amount = tx.get('amount', 0)
-        amount_type = 'expense' if amount < 0 else 'income'
-        
-        # Clean notes - remove any AI confidence markers from previous runs
-        if '[AI:' in notes:
-            notes = notes.split('[AI:')[0].strip()
-        
-        # Create feature text
-        text = f"{payee} {notes} {amount_type}".strip().lower()
-        
-        if text and tx['category'] in category_map:
+    # Skip uncategorized transactions and unknown categories
+    categorized = [
+        tx for tx in data['transactions']
+        if tx.get('category') and tx['category'] in category_map
+    ]
+    
+    # Combine payee + notes + amount info as features
+    texts = []
+    labels = []
+    for tx, text in zip(categorized, prepare_features(categorized)):
+        if text:
             texts.append(text)
             labels.append(tx['category'])
     
@@ -53,21 +48,24 @@ def load_training_data(data_file: Path) -> tuple[list[str], list[str], dict]:
 def train_model(texts: list[str], labels: list[str]) -> Pipeline:
     """
     Train a text classification pipeline.
-    Uses TF-IDF vectorization + Multinomial Naive Bayes.
+    Uses hashed TF-IDF features + Multinomial Naive Bayes.
     """
     pipeline = Pipeline([
-        ('tfidf', TfidfVectorizer(
+        ('hash', HashingVectorizer(
+            n_features=2**14,
             ngram_range=(1, 2),  # Use unigrams and bigrams
-            max_features=5000,
-            min_df=1,
+            alternate_sign=False,  # MultinomialNB needs non-negative features
+            norm=None,  # raw counts; TfidfTransformer normalizes
+            dtype=np.float32,
             strip_accents='unicode',
             lowercase=True,
         )),
+        ('tfidf', TfidfTransformer(sublinear_tf=True)),
         ('clf', MultinomialNB(alpha=0.1)),
     ])
     
     pipeline.fit(texts, labels)
-    return pipeline
+    return finalize_model(pipeline)
 
 
 def evaluate_model(pipeline: Pipeline, texts: list[str], labels: list[str]) -> float:
@@ -110,7 +108,7 @@ def main():
     print(f"   Cross-validation accuracy: {accuracy:.1%}")
     
     print(f"\n💾 Saving model to {model_file}")
-    dump(pipeline, model_file)
+    dump(pipeline, model_file, compress=3)
     
     # Save category mapping
     with open(categories_file, 'w', encoding='utf-8') as f: